@@ -2,7 +2,9 @@
 
 from __future__ import annotations # Allows for self type hinting
 from random import randint         # Used to generate random numbers
-from dataclasses import dataclass  # Used to make objects more memory efficient
+from dataclasses import dataclass, field  # Used to make objects more memory efficient
+from array import array            # Used to store ints without boxing them
+import tracemalloc                 # Used to measure memory usage
 
 @dataclass
 class Node:
@@ -167,6 +169,154 @@ class BST:
         return
 
 
+@dataclass
+class IntBST:
+    """A BST of ints where every node lives in one pool (arena) of arrays instead of being it's own Node object
+
+    Attributes
+    ----------
+    values: array
+        values[i] is the value of node i
+
+    left: array
+        left[i] is the index of the left child of node i, or -1 if it has none
+
+    right: array
+        right[i] is the index of the right child of node i, or -1 if it has none
+
+    free: array
+        Indexes of removed nodes, these are re-used by insert
+
+    root: int
+        The index of the root node, or -1 if the tree is empty
+
+    number_of_nodes: int
+        The number of values in the tree
+
+    Notes
+    -----
+    A Node stores it's value as a boxed int along with an object and a __dict__, here each node is 3
+    unboxed 64-bit ints (24 bytes). Values must fit in a signed 64-bit int
+    """
+    values:array = field(default_factory=lambda: array("q"))
+    left:array = field(default_factory=lambda: array("q"))
+    right:array = field(default_factory=lambda: array("q"))
+    free:array = field(default_factory=lambda: array("q"))
+    root:int = -1
+    number_of_nodes:int = 0
+
+    def _new_node(self, value:int) -> int:
+        """Puts a value in a free slot of the arena (or a new one) and returns it's index"""
+        if self.free:
+            index = self.free.pop()
+            self.values[index] = value
+            self.left[index] = -1
+            self.right[index] = -1
+        else:
+            index = len(self.values)
+            self.values.append(value)
+            self.left.append(-1)
+            self.right.append(-1)
+        self.number_of_nodes += 1
+        return index
+
+    def insert(self, value:int) -> None:
+        """Inserts a value into the tree, if it isn't already there
+
+        Same as BST.insert(), but follows indexes in left/right instead of Node references
+
+        Parameters
+        ----------
+        value : int
+            The number to append
+        """
+        if self.root == -1:
+            self.root = self._new_node(value)
+            return
+        values, left, right = self.values, self.left, self.right
+        current_node = self.root
+        while True:
+            current_value = values[current_node]
+            if value > current_value:
+                if right[current_node] == -1:
+                    right[current_node] = self._new_node(value)
+                    return
+                current_node = right[current_node]
+            elif value < current_value:
+                if left[current_node] == -1:
+                    left[current_node] = self._new_node(value)
+                    return
+                current_node = left[current_node]
+            else:
+                return # Node is in tree
+
+    def search(self, value:int) -> tuple[bool, int]:
+        """Search for a value, and return a bool indicating if it is there and the number of operations it took to find or not find it
+
+        Parameters
+        ----------
+        value : int
+            The number to search for
+
+        Returns
+        -------
+        bool, int
+            Boolean is if it was found, the int is the number of operations to find (or not find) number
+        """
+        if self.root == -1:
+            return False, 1
+        values, left, right = self.values, self.left, self.right
+        operations = 0
+        current_node = self.root
+        while current_node != -1:
+            operations += 1
+            current_value = values[current_node]
+            if current_value == value:
+                return True, operations
+            current_node = left[current_node] if current_value > value else right[current_node]
+        return False, operations + 1
+
+    def remove(self, value:int) -> None:
+        """Removes a value if it's present
+
+        Parameters
+        ----------
+        value : int
+            The integer to remove
+        """
+        values, left, right = self.values, self.left, self.right
+
+        # 1. Find the node and it's parent
+        parent_node = -1
+        current_node = self.root
+        while current_node != -1 and values[current_node] != value:
+            parent_node = current_node
+            current_node = left[current_node] if values[current_node] > value else right[current_node]
+        if current_node == -1: # Not in tree
+            return
+
+        # 2. Node has both children, copy the leftmost value of the right subtree up, and remove that node instead
+        if left[current_node] != -1 and right[current_node] != -1:
+            successor_parent = current_node
+            successor = right[current_node]
+            while left[successor] != -1:
+                successor_parent = successor
+                successor = left[successor]
+            values[current_node] = values[successor]
+            parent_node, current_node = successor_parent, successor
+
+        # 3. Node has at most one child now, link the child to the parent
+        child = left[current_node] if left[current_node] != -1 else right[current_node]
+        if parent_node == -1:
+            self.root = child
+        elif left[parent_node] == current_node:
+            left[parent_node] = child
+        else:
+            right[parent_node] = child
+        self.free.append(current_node)
+        self.number_of_nodes -= 1
+
+
 def test_number_of_checks(number_of_nodes:int=10_000, number_of_searches:int=100, max_number: int=1_000_000) -> tuple[list[int],list[int]]:
     """Tests a list and BST of number_of_nodes of random numbers between 0-1_000_000 number_of_searches times
 
@@ -203,6 +353,27 @@ def test_number_of_checks(number_of_nodes:int=10_000, number_of_searches:int=100
     return bst_checks, list_checks
 
 
+def test_memory(number_of_nodes:int=100_000, max_number: int=1_000_000) -> tuple[int, int]:
+    """Tests how much memory a BST and an IntBST use to store number_of_nodes random numbers between 0-max_number
+
+    Returns
+    -------
+    tuple[int, int]
+        The number of bytes the BST used, and the number of bytes the IntBST used
+    """
+    numbers = [randint(0, max_number) for _ in range(number_of_nodes)]
+    results = []
+    for tree_type in (BST, IntBST):
+        tracemalloc.start()
+        tree = tree_type()
+        for x in numbers:
+            tree.insert(x)
+        results.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del tree
+    return results[0], results[1]
+
+
 if __name__ == '__main__':
     runs = [] # Averages
 
@@ -221,3 +392,5 @@ if __name__ == '__main__':
     
     print(f"\n{'='*30}\nBST averaged {bst_average/number_of_runs} checks\nList averaged {l_average/number_of_runs} checks\nBST was {(l_average/number_of_runs)/(bst_average/number_of_runs):.2f}x faster")
 
+    bst_bytes, int_bst_bytes = test_memory()
+    print(f"\n{'='*30}\nBST used {bst_bytes:,} bytes\nIntBST used {int_bst_bytes:,} bytes\nIntBST used {bst_bytes/int_bst_bytes:.2f}x less memory")
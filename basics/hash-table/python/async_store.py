@@ -0,0 +1,360 @@
+import asyncio
+from time import perf_counter                              # Used to time the demo
+from concurrent.futures import ThreadPoolExecutor          # Used to apply batches off of the event loop
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from hashtable import HashTableImproved
+
+_PUT = "put"
+_DELETE = "delete"
+
+
+class AsyncStore:
+    def __init__(self, get: Callable[[Any], Any], put: Callable[[Any, Any], None], delete: Callable[[Any], None], max_batch_size: int = 256, max_delay: float = 0.001) -> None:
+        """An asyncio front-end for a (blocking) key-value store, which batches up writes
+
+        Parameters
+        ----------
+        get : Callable[[Any], Any]
+            Returns the value for a key in the store, raises ValueError if it's not there
+
+        put : Callable[[Any, Any], None]
+            Sets the value for a key in the store
+
+        delete : Callable[[Any], None]
+            Removes a key from the store, raises ValueError if it's not there
+
+        max_batch_size : int, optional
+            The most writes applied in one batch, by default 256
+
+        max_delay : float, optional
+            The longest (in seconds) a write waits for others to join it's batch, by default 0.001
+
+        Notes
+        -----
+        All calls to the store happen one at a time on a single worker thread, so the event loop
+        never blocks on a split or rehash, and the store never needs to be thread safe.
+        Writes to the same key in one batch are coalesced, so the store is only called once per key.
+        Writes that are queued but not applied yet are kept in an overlay, so reads always see them.
+
+        Examples
+        --------
+        ```
+        async with AsyncStore.for_table(HashTableImproved()) as store:
+            await store.put("novelty", 10)
+            await store.get("novelty") # 10
+        ```
+        """
+        self._get = get
+        self._put = put
+        self._delete = delete
+        self.max_batch_size: int = max_batch_size
+        self.max_delay: float = max_delay
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._pending: Dict[Any, Tuple[str, Any, int]] = {}  # key -> (operation, value, sequence number)
+        self._sequence: int = 0
+        self._closed: bool = False
+
+    @classmethod
+    def for_table(cls, table: HashTableImproved, **kwargs) -> "AsyncStore":
+        """Creates an AsyncStore in front of a HashTableImproved
+
+        Parameters
+        ----------
+        table : HashTableImproved
+            The table to store key-value pairs in
+
+        **kwargs
+            Passed to AsyncStore (max_batch_size and max_delay)
+
+        Returns
+        -------
+        AsyncStore
+            The store
+        """
+        return cls(table.__getitem__, table.__setitem__, table.__delitem__, **kwargs)
+
+    @classmethod
+    def for_tree(cls, tree: Any, **kwargs) -> "AsyncStore":
+        """Creates an AsyncStore in front of a BTree (from trees-graphs/B-B+Trees/python/b-tree.py)
+
+        Parameters
+        ----------
+        tree : BTree
+            The tree to store key-value pairs in
+
+        **kwargs
+            Passed to AsyncStore (max_batch_size and max_delay)
+
+        Returns
+        -------
+        AsyncStore
+            The store
+
+        Notes
+        -----
+        BTree.insert() allows duplicate keys, so put() replaces the value in place if the key is already there
+        """
+        def get(key):
+            result = tree.search_key(key)
+            if result is None:
+                raise ValueError(f"No value found for key {key}")
+            node, index = result
+            return node.keys[index][1]
+
+        def put(key, value):
+            result = tree.search_key(key)
+            if result is None:
+                tree.insert((key, value))
+            else:
+                node, index = result
+                node.keys[index] = (key, value)
+
+        def delete(key):
+            if tree.search_key(key) is None:
+                raise ValueError(f"No value found for key {key}")
+            tree.delete(tree.root, (key, None))
+
+        return cls(get, put, delete, **kwargs)
+
+    async def get(self, key: Any) -> Any:
+        """Find a value for a given key
+
+        Parameters
+        ----------
+        key : Any
+            The key to search for
+
+        Returns
+        -------
+        Any
+            The value associated with the key
+
+        Raises
+        ------
+        ValueError
+            If the key does not exist
+
+        RuntimeError
+            If the store has been closed
+        """
+        if self._closed:
+            raise RuntimeError("AsyncStore is closed")
+
+        # 1. Writes that haven't been applied yet are newer than what's in the store
+        if key in self._pending:
+            operation, value, _ = self._pending[key]
+            if operation == _DELETE:
+                raise ValueError(f"No value found for key {key}")
+            return value
+
+        # 2. Otherwise read from the store on the worker thread
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._get, key)
+
+    async def put(self, key: Any, value: Any) -> None:
+        """Sets the value for a key, returns once the batch it's in has been applied
+
+        Parameters
+        ----------
+        key : Any
+            The key to associate to a value
+
+        value : Any
+            A value to store for the key
+
+        Raises
+        ------
+        RuntimeError
+            If the store has been closed
+        """
+        await self._submit(_PUT, key, value)
+
+    async def delete(self, key: Any) -> None:
+        """Removes a key, returns once the batch it's in has been applied
+
+        Parameters
+        ----------
+        key : Any
+            The key to remove
+
+        Raises
+        ------
+        ValueError
+            If the key does not exist when the batch is applied
+
+        RuntimeError
+            If the store has been closed
+        """
+        await self._submit(_DELETE, key, None)
+
+    async def close(self) -> None:
+        """Applies any queued writes, then stops the writer task and worker thread, later calls raise RuntimeError"""
+        self._closed = True
+        if self._writer is not None:
+            await self._queue.join()
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        self._executor.shutdown()
+
+    async def __aenter__(self) -> "AsyncStore":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def _submit(self, operation: str, key: Any, value: Any) -> None:
+        """Queues a write for the writer task, and waits for it to be applied"""
+        if self._closed:
+            raise RuntimeError("AsyncStore is closed")
+        if self._writer is None:
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._write_batches())
+
+        self._sequence += 1
+        self._pending[key] = (operation, value, self._sequence)
+        done = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, key, value, self._sequence, done))
+        await done
+
+    async def _write_batches(self) -> None:
+        """The writer task, collects writes into batches and applies them on the worker thread"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                # 1. Wait for a write, then give others up to max_delay to join the batch
+                batch.append(await self._queue.get())
+                if self.max_delay > 0 and self._queue.qsize() < self.max_batch_size - 1:
+                    await asyncio.sleep(self.max_delay)
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                # 2. Apply it off of the event loop
+                errors = await loop.run_in_executor(self._executor, self._apply, batch)
+            except asyncio.CancelledError:
+                # Nothing will apply the writes that are left, so cancel them instead of leaving them waiting
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                self._finish_batch(batch, {}, cancelled=True)
+                raise
+            except Exception as error:
+                # The batch couldn't be applied at all (i.e. the worker thread was shut down)
+                errors = {sequence: error for _, _, _, sequence, _ in batch}
+
+            # 3. Let the writers know
+            self._finish_batch(batch, errors)
+
+    def _finish_batch(self, batch: List[Tuple[str, Any, Any, int, asyncio.Future]], errors: Dict[int, Exception], cancelled: bool = False) -> None:
+        """Resolves the futures for a batch of writes, and drops the writes from the overlay (unless a newer one came in)
+
+        Parameters
+        ----------
+        batch : List[Tuple[str, Any, Any, int, asyncio.Future]]
+            The writes, as (operation, key, value, sequence number, future)
+
+        errors : Dict[int, Exception]
+            The sequence numbers of the writes that failed, and the error they failed with
+
+        cancelled : bool, optional
+            If True the writes were never applied, and their futures are cancelled. Default is False
+        """
+        for _, key, _, sequence, done in batch:
+            if key in self._pending and self._pending[key][2] == sequence:
+                del self._pending[key]
+            if not done.done():
+                if cancelled:
+                    done.cancel()
+                elif sequence in errors:
+                    done.set_exception(errors[sequence])
+                else:
+                    done.set_result(None)
+            self._queue.task_done()
+
+    def _apply(self, batch: List[Tuple[str, Any, Any, int, asyncio.Future]]) -> Dict[int, Exception]:
+        """Applies a batch of writes to the store, with at most one call to the store per key
+
+        Parameters
+        ----------
+        batch : List[Tuple[str, Any, Any, int, asyncio.Future]]
+            The writes, as (operation, key, value, sequence number, future)
+
+        Returns
+        -------
+        Dict[int, Exception]
+            The sequence numbers of the writes that failed, and the error they failed with
+
+        Notes
+        -----
+        The writes for each key are replayed in order to find the key's final state, and only that is
+        applied. The store is only checked for a key if it's first write is a delete, since that
+        delete (and only that kind of delete) can fail.
+        """
+        writes = {}
+        for operation, key, value, sequence, _ in batch:
+            writes.setdefault(key, []).append((operation, value, sequence))
+
+        errors = {}
+        for key, key_writes in writes.items():
+            try:
+                # 1. Replay the writes, exists is None until we know if the key is in the store
+                exists = None
+                if key_writes[0][0] == _DELETE:
+                    exists = self._contains(key)
+                deleted = False
+                for operation, value, sequence in key_writes:
+                    if operation == _PUT:
+                        exists, final_value = True, value
+                    elif exists is False:
+                        errors[sequence] = ValueError(f"No value found for key {key}")
+                    else:
+                        exists, deleted = False, True
+
+                # 2. Apply the final state
+                if exists:
+                    self._put(key, final_value)
+                elif deleted:
+                    try:
+                        self._delete(key)
+                    except ValueError:
+                        pass # Only put in this batch, so it was never in the store
+            except Exception as error:
+                for _, _, sequence in key_writes:
+                    errors[sequence] = error
+        return errors
+
+    def _contains(self, key: Any) -> bool:
+        """Checks if a key is in the store"""
+        try:
+            self._get(key)
+            return True
+        except ValueError:
+            return False
+
+if __name__ == "__main__":
+    number_of_writers = 1_000
+    writes_per_writer = 10
+
+    async def writer(store: AsyncStore, writer_id: int):
+        for i in range(writes_per_writer):
+            await store.put(f"key-{(writer_id * writes_per_writer + i) % 2_000}", i)
+
+    async def main():
+        async with AsyncStore.for_table(HashTableImproved()) as store:
+            start = perf_counter()
+            await asyncio.gather(*(writer(store, writer_id) for writer_id in range(number_of_writers)))
+            print(f"{number_of_writers} writers did {number_of_writers * writes_per_writer} writes in {perf_counter() - start:.2f}s")
+            print(await store.get("key-42"))
+            await store.delete("key-42")
+            try:
+                await store.get("key-42")
+            except ValueError as error:
+                print(error)
+
+    asyncio.run(main())
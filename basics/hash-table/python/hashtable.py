@@ -41,7 +41,7 @@ class HashTable:
         """
 
         # 2 & 3 Hash the key and then modulo the result by 16
-        index = int(hash_function(key) % 16)
+        index = int(hash_function(key.encode()).hexdigest(), 16) % 16
         
         # 4.  Create a node which contains the value and the key
         new_node = Node(key, value)
@@ -71,7 +71,7 @@ class HashTable:
             If the key does not exist
         """
         # 1 & 2 Hash the key and then modulo the result by 16
-        index = int(hash_function(key) % 16)
+        index = int(hash_function(key.encode()).hexdigest(), 16) % 16
         
         # 3. Look into the bucket at the given index
         if self.buckets[index]:
@@ -112,7 +112,7 @@ class HashTableImproved:
         """
 
         # 1 & 2 Hash the key and then modulo the result by 16
-        index = int(hash_function(key) % 16)
+        index = int(hash_function(key.encode()).hexdigest(), 16) % 16
 
         # 3. Look into the bucket at the given index
         if self.buckets[index]:
@@ -121,6 +121,7 @@ class HashTableImproved:
                 if node.key == key:
                     ## 3.2 The current node matches the key you're looking for
                     return node.value
+            raise ValueError(f"No value found for key {key}")
         else: 
             raise ValueError(f"No value found for key {key}")
     
@@ -141,7 +142,7 @@ class HashTableImproved:
         """
         
         # 2 & 3 Hash the key and then modulo the result by 16
-        index = int(hash_function(key) % 16)
+        index = int(hash_function(key.encode()).hexdigest(), 16) % 16
         
         # 4.  Create a node which contains the value and the key
         new_node = Node(key, value)
@@ -158,6 +159,33 @@ class HashTableImproved:
         else: # If current bucket is empty
             self.buckets[index] = [new_node]
             
+    def __delitem__(self, key:str):
+        """Removes a key-value pair from the buckets
+
+        Parameters
+        ----------
+        key : str
+            The key to remove
+
+        Raises
+        ------
+        ValueError
+            If the key does not exist
+
+        Notes
+        -----
+        The naming allows for dictionary deletion (del HashTable()[key])
+        """
+        # 1 & 2 Hash the key and then modulo the result by 16
+        index = int(hash_function(key.encode()).hexdigest(), 16) % 16
+
+        # 3. Find the node in the bucket and remove it
+        for position, node in enumerate(self.buckets[index]):
+            if node.key == key:
+                self.buckets[index].pop(position)
+                return
+        raise ValueError(f"No value found for key {key}")
+
     def __repr__(self) ->str:
         result = "HashTableImproved: {"
         for bucket in self.buckets:
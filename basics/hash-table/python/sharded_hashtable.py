@@ -0,0 +1,481 @@
+import os                                                  # Used to find the number of cores
+import struct                                              # Used to pack the header of a built shard
+from time import perf_counter                              # Used to time the builds
+from hashlib import sha256 as hash_function
+from array import array                                    # Used to pack keys and values without pickling
+from itertools import accumulate
+from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor, wait  # Used to build shards in parallel
+from multiprocessing.shared_memory import SharedMemory     # Used to hand built shards back to the parent
+from multiprocessing import resource_tracker
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+from hashtable import HashTableImproved, Node
+
+
+def shard_index(key:str, number_of_shards:int) -> int:
+    """Finds which shard a key belongs to
+
+    Parameters
+    ----------
+    key : str
+        The key to route
+
+    number_of_shards : int
+        How many shards the keys are spread across
+
+    Returns
+    -------
+    int
+        The index of the shard the key belongs to
+
+    Notes
+    -----
+    This uses the first 8 bytes of the digest, the buckets inside each HashTableImproved use
+    the last 4 bits. If both used the same bits every key in a shard would land in the same bucket.
+    The builtin hash() can't be used because it's randomized per process.
+    """
+    return int.from_bytes(hash_function(key.encode()).digest()[:8], "big") % number_of_shards
+
+
+# Blocks are passed between processes by name through shared memory on POSIX. On Windows a block is
+# freed as soon as the process that made it closes it, so the packed bytes are sent back instead
+_USE_SHARED_MEMORY = os.name == "posix"
+
+# HashTableImproved always has 16 buckets
+_NUMBER_OF_BUCKETS = 16
+
+# A packed block is a header, followed by these sections:
+#   key lengths:   array("q"), the number of characters in each key
+#   tags:          array("q"), one per key (the bucket the key goes in, once it's been hashed)
+#   values:        array(value_typecode), one per key
+#   keys:          every key joined together, encoded as UTF-8
+_HEADER = struct.Struct("<qq") # number of keys, number of bytes of keys
+
+Handle = Union[str, bytes] # A shared memory block name, or the packed bytes themselves
+
+
+def _pack(keys:List[str], values:List[Any], value_typecode:str, tags:Optional[List[int]] = None) -> Handle:
+    """Packs key-value pairs as flat arrays (see _HEADER) instead of pickling them
+
+    Parameters
+    ----------
+    keys : List[str]
+        The keys to pack
+
+    values : List[Any]
+        The values to pack, values[i] goes with keys[i]
+
+    value_typecode : str
+        The array typecode to pack the values as (i.e. "q" for ints, "d" for floats)
+
+    tags : List[int], optional
+        An int to pack with each key, by default all 0
+
+    Returns
+    -------
+    Handle
+        The name of the shared memory block holding the packed pairs, or the packed bytes if shared memory isn't used
+    """
+    encoded_keys = "".join(keys).encode()
+    sections = [
+        _HEADER.pack(len(keys), len(encoded_keys)),
+        array("q", map(len, keys)).tobytes(),
+        array("q", tags).tobytes() if tags is not None else bytes(8 * len(keys)),
+        array(value_typecode, values).tobytes(),
+        encoded_keys,
+    ]
+    if not _USE_SHARED_MEMORY:
+        return b"".join(sections)
+
+    block = SharedMemory(create=True, size=max(sum(map(len, sections)), 1))
+    offset = 0
+    for section in sections:
+        block.buf[offset:offset + len(section)] = section
+        offset += len(section)
+    block.close()
+    return block.name
+
+
+def _unpack(handle:Handle, value_typecode:str, in_worker:bool) -> Tuple[List[str], array, array]:
+    """Reads back key-value pairs packed by _pack(), without freeing them
+
+    Parameters
+    ----------
+    handle : Handle
+        What _pack() returned
+
+    value_typecode : str
+        The array typecode the values were packed as
+
+    in_worker : bool
+        True if called in a worker process, so this process' tracker doesn't unlink the block when it exits
+
+    Returns
+    -------
+    Tuple[List[str], array, array]
+        The keys, tags and values
+    """
+    if isinstance(handle, bytes):
+        return _read_sections(memoryview(handle), value_typecode)
+    block = SharedMemory(name=handle)
+    try:
+        return _read_sections(block.buf, value_typecode)
+    finally:
+        block.close()
+        if in_worker:
+            _disown(handle)
+
+
+def _read_sections(buffer:memoryview, value_typecode:str) -> Tuple[List[str], array, array]:
+    """Copies the sections of a packed block out of a buffer, see _unpack()"""
+    number_of_keys, keys_size = _HEADER.unpack_from(buffer)
+    offset = _HEADER.size
+    sections = []
+    for typecode in ("q", "q", value_typecode):
+        section = array(typecode)
+        size = number_of_keys * section.itemsize
+        section.frombytes(buffer[offset:offset + size])
+        sections.append(section)
+        offset += size
+    joined_keys = bytes(buffer[offset:offset + keys_size]).decode()
+
+    key_lengths, tags, values = sections
+    ends = list(accumulate(key_lengths))
+    keys = list(map(joined_keys.__getitem__, map(slice, [0] + ends[:-1], ends)))
+    return keys, tags, values
+
+
+def _disown(handle:Optional[Handle]) -> None:
+    """Stops this (worker) process' resource tracker from unlinking a block when the process exits
+
+    Notes
+    -----
+    The tracker registers a block whenever a process creates or attaches to it, and only runs on POSIX,
+    where it tracks the name with a leading /. The parent process is the one that unlinks every block
+    """
+    if isinstance(handle, str):
+        resource_tracker.unregister(f"/{handle}", "shared_memory")
+
+
+def _free(handle:Optional[Handle]) -> None:
+    """Unlinks a shared memory block in the parent process, if it still exists"""
+    if not isinstance(handle, str):
+        return
+    try:
+        block = SharedMemory(name=handle)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+def _partition_chunk(chunk:Handle, number_of_shards:int, value_typecode:str) -> List[Optional[Handle]]:
+    """Splits a chunk of the input by shard inside a worker process
+
+    Parameters
+    ----------
+    chunk : Handle
+        A packed chunk of the key-value pairs, in input order
+
+    number_of_shards : int
+        How many shards the keys are spread across
+
+    value_typecode : str
+        The array typecode the values are packed as
+
+    Returns
+    -------
+    List[Optional[Handle]]
+        One packed piece per shard (None if no keys went to it), tagged with the bucket each key goes in
+    """
+    keys, _, values = _unpack(chunk, value_typecode, in_worker=True)
+    shard_keys = [[] for _ in range(number_of_shards)]
+    shard_values = [[] for _ in range(number_of_shards)]
+    shard_buckets = [[] for _ in range(number_of_shards)]
+    for key, value in zip(keys, values):
+        # Each key is hashed once, the same way shard_index() and HashTableImproved would
+        digest = hash_function(key.encode()).digest()
+        shard = int.from_bytes(digest[:8], "big") % number_of_shards
+        shard_keys[shard].append(key)
+        shard_values[shard].append(value)
+        shard_buckets[shard].append(digest[-1] % _NUMBER_OF_BUCKETS)
+
+    pieces = []
+    try:
+        for shard in range(number_of_shards):
+            pieces.append(_pack(shard_keys[shard], shard_values[shard], value_typecode, shard_buckets[shard]) if shard_keys[shard] else None)
+    except BaseException:
+        for piece in pieces:
+            _free(piece)
+        raise
+    for piece in pieces:
+        _disown(piece)
+    return pieces
+
+
+def _build_shard(pieces:List[Handle], value_typecode:str) -> Handle:
+    """Merges the pieces of one shard (from every chunk) inside a worker process
+
+    Parameters
+    ----------
+    pieces : List[Handle]
+        The shard's pieces from _partition_chunk(), in input order
+
+    value_typecode : str
+        The array typecode the values are packed as
+
+    Returns
+    -------
+    Handle
+        The packed shard, in bucket order and tagged with each key's bucket
+
+    Notes
+    -----
+    This gives the same buckets as inserting every pair into a HashTableImproved (a key stays where it
+    was first inserted, and the last value wins), without scanning a bucket for every insert
+    """
+    buckets = {}
+    latest = {}
+    for piece in pieces:
+        keys, tags, values = _unpack(piece, value_typecode, in_worker=True)
+        for key, bucket, value in zip(keys, tags, values):
+            buckets.setdefault(key, bucket)
+            latest[key] = value
+
+    ordered = [[] for _ in range(_NUMBER_OF_BUCKETS)]
+    for key, bucket in buckets.items():
+        ordered[bucket].append(key)
+    keys = [key for bucket in ordered for key in bucket]
+    shard = _pack(keys, [latest[key] for key in keys], value_typecode, [buckets[key] for key in keys])
+    _disown(shard)
+    return shard
+
+
+def _gather(futures:List[Future], handles:List[Handle]) -> List[Any]:
+    """Waits for every future, remembering every block they made so the parent can free them
+
+    Parameters
+    ----------
+    futures : List[Future]
+        The futures to wait for
+
+    handles : List[Handle]
+        Every block the futures returned is appended to this
+
+    Returns
+    -------
+    List[Any]
+        The results, in the same order as futures
+
+    Raises
+    ------
+    Exception
+        The first error any of the futures raised, once they've all finished
+    """
+    wait(futures)
+    results = []
+    error = None
+    for future in futures:
+        if future.exception() is not None:
+            error = error or future.exception()
+            continue
+        result = future.result()
+        handles.extend(result if isinstance(result, list) else [result])
+        results.append(result)
+    if error is not None:
+        raise error
+    return results
+
+
+@dataclass
+class ShardedHashTable:
+    """A HashTable that splits it's keys across several independent HashTableImproved's (shards)
+
+    Attributes
+    ----------
+    number_of_shards: int
+        How many shards to split the keys across, defaults to the number of cores
+
+    shards: List[HashTableImproved]
+        The shards, a key always lives in shards[shard_index(key, number_of_shards)]
+    """
+    number_of_shards:int = os.cpu_count() or 1
+    shards:Optional[List[HashTableImproved]] = None
+
+    def __post_init__(self):
+        if self.shards is None:
+            self.shards = [HashTableImproved() for _ in range(self.number_of_shards)]
+        self.number_of_shards = len(self.shards)
+
+    @classmethod
+    def build(cls, items:Iterable[Tuple[str, Any]], number_of_shards:Optional[int] = None, max_workers:Optional[int] = None, value_typecode:str = "q") -> "ShardedHashTable":
+        """Builds a table from a lot of key-value pairs at once, building each shard in it's own process
+
+        Parameters
+        ----------
+        items : Iterable[Tuple[str, Any]]
+            The key-value pairs to insert, if a key shows up more than once the last value wins
+
+        number_of_shards : int, optional
+            How many shards to split the keys across, defaults to the number of cores
+
+        max_workers : int, optional
+            How many processes to use, defaults to the number of cores
+
+        value_typecode : str, optional
+            The array typecode the values are packed as to send them back, by default "q" (64-bit ints).
+            Use "d" for floats
+
+        Returns
+        -------
+        ShardedHashTable
+            The built table
+
+        Notes
+        -----
+        The input is split into one chunk per worker, each worker hashes it's chunk once to find each key's
+        shard and bucket, then one task per shard merges that shard's pieces. The parent only packs the
+        chunks and creates the Nodes. Everything is passed as flat arrays instead of being pickled, so
+        values have to fit value_typecode. On POSIX the arrays are passed through shared memory, elsewhere
+        the packed bytes are sent through the futures.
+
+        If anything fails the error is raised, after freeing every shared memory block that was made.
+        When run as a script this has to be called under if __name__ == "__main__"
+        """
+        number_of_shards = number_of_shards or os.cpu_count() or 1
+        max_workers = max_workers or os.cpu_count() or 1
+        items = list(items)
+        chunk_size = -(-len(items) // max_workers) or 1
+        handles = [] # Every block that's been made, the parent frees them all at the end
+
+        shards = [HashTableImproved() for _ in range(number_of_shards)]
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                # 1. Pack the input into one chunk per worker (without hashing it), and split each chunk by shard
+                chunks = []
+                for start in range(0, len(items), chunk_size):
+                    chunk = items[start:start + chunk_size]
+                    chunks.append(_pack([key for key, _ in chunk], [value for _, value in chunk], value_typecode))
+                    handles.append(chunks[-1])
+                partitioned = _gather([executor.submit(_partition_chunk, chunk, number_of_shards, value_typecode) for chunk in chunks], handles)
+
+                # 2. Merge each shard's pieces from every chunk
+                futures = {}
+                for shard in range(number_of_shards):
+                    pieces = [chunk_pieces[shard] for chunk_pieces in partitioned if chunk_pieces[shard] is not None]
+                    if pieces:
+                        futures[shard] = executor.submit(_build_shard, pieces, value_typecode)
+                built = dict(zip(futures, _gather(list(futures.values()), handles)))
+
+            # 3. Create the Nodes, the keys are already in bucket order so nothing is rehashed
+            for shard, handle in built.items():
+                keys, tags, values = _unpack(handle, value_typecode, in_worker=False)
+                nodes = list(map(Node, keys, values))
+                start = 0
+                for bucket in range(_NUMBER_OF_BUCKETS):
+                    size = tags.count(bucket)
+                    shards[shard].buckets[bucket] = nodes[start:start + size]
+                    start += size
+        finally:
+            for handle in handles:
+                _free(handle)
+        return cls(number_of_shards=number_of_shards, shards=shards)
+
+    def __getitem__(self, key:str) -> Any:
+        """Find a value for a given key
+
+        Parameters
+        ----------
+        key : str
+            The key to search for
+
+        Returns
+        -------
+        Any
+            The value associated with the key
+
+        Raises
+        ------
+        ValueError
+            If the key does not exist
+        """
+        return self.shards[shard_index(key, self.number_of_shards)][key]
+
+    def __setitem__(self, key:str, value:Any):
+        """Inserts a key-value pair into the right shard
+
+        Parameters
+        ----------
+        key : str
+            The key to associate to a value
+
+        value : Any
+            A value to store for the key
+        """
+        self.shards[shard_index(key, self.number_of_shards)][key] = value
+
+    def get_many(self, keys:Iterable[str], default:Any = None) -> List[Any]:
+        """Looks up a batch of keys, grouping them by shard so each shard is visited once
+
+        Parameters
+        ----------
+        keys : Iterable[str]
+            The keys to search for
+
+        default : Any, optional
+            The value to use for keys that don't exist, by default None
+
+        Returns
+        -------
+        List[Any]
+            The values, in the same order as the keys were given
+        """
+        keys = list(keys)
+        batches = [[] for _ in range(self.number_of_shards)]
+        for position, key in enumerate(keys):
+            batches[shard_index(key, self.number_of_shards)].append(position)
+
+        results = [default] * len(keys)
+        for shard, positions in zip(self.shards, batches):
+            for position in positions:
+                try:
+                    results[position] = shard[keys[position]]
+                except ValueError:
+                    pass
+        return results
+
+    def __repr__(self) -> str:
+        return f"ShardedHashTable(number_of_shards={self.number_of_shards}): [{', '.join(repr(shard) for shard in self.shards)}]"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+
+if __name__ == "__main__":
+    number_of_keys = 20_000
+    items = [(f"key-{i}", i) for i in range(number_of_keys)]
+
+    start = perf_counter()
+    table = HashTableImproved()
+    for key, value in items:
+        table[key] = value
+    print(f"HashTableImproved took {perf_counter() - start:.2f}s to insert {number_of_keys} keys")
+
+    start = perf_counter()
+    sharded = ShardedHashTable()
+    for key, value in items:
+        sharded[key] = value
+    print(f"ShardedHashTable ({sharded.number_of_shards} shards) took {perf_counter() - start:.2f}s to insert {number_of_keys} keys one at a time")
+
+    # Same number of shards both times, so the difference is only from the extra processes
+    start = perf_counter()
+    sharded = ShardedHashTable.build(items, max_workers=1)
+    print(f"ShardedHashTable ({sharded.number_of_shards} shards) took {perf_counter() - start:.2f}s to build {number_of_keys} keys with 1 process")
+
+    start = perf_counter()
+    sharded = ShardedHashTable.build(items)
+    print(f"ShardedHashTable ({sharded.number_of_shards} shards) took {perf_counter() - start:.2f}s to build {number_of_keys} keys with {os.cpu_count()} processes")
+
+    print(sharded["key-42"])
+    print(sharded.get_many(["key-1", "key-2", "not a key"]))
@@ -1,6 +1,12 @@
+import tracemalloc
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from heapq import heapify, heappop, heapreplace
 from math import log, floor, ceil
-from random import randint
-from typing import Any, List, Optional, Tuple
+from random import Random, randint
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 class BTreeNode:
     def __init__(self, is_leaf: bool = False) -> None:
@@ -110,23 +116,15 @@ class BTree:
         elif len(node.children[i].keys) >= t:
             self.delete(node.children[i], key_value)
         else:
-            if i != 0 and i + 2 < len(node.children):
-                if len(node.children[i - 1].keys) >= t:
-                    self.delete_sibling(node, i, i - 1)
-                elif len(node.children[i + 1].keys) >= t:
-                    self.delete_sibling(node, i, i + 1)
-                else:
-                    self.delete_merge(node, i, i + 1)
-            elif i == 0:
-                if len(node.children[i + 1].keys) >= t:
-                    self.delete_sibling(node, i, i + 1)
-                else:
-                    self.delete_merge(node, i, i + 1)
-            elif i + 1 == len(node.children):
-                if len(node.children[i - 1].keys) >= t:
-                    self.delete_sibling(node, i, i - 1)
-                else:
-                    self.delete_merge(node, i, i - 1)
+            if i != 0 and len(node.children[i - 1].keys) >= t:
+                self.delete_sibling(node, i, i - 1)
+            elif i + 1 < len(node.children) and len(node.children[i + 1].keys) >= t:
+                self.delete_sibling(node, i, i + 1)
+            elif i + 1 < len(node.children):
+                self.delete_merge(node, i, i + 1)
+            else:
+                self.delete_merge(node, i, i - 1)
+                i -= 1 # Merged into the left sibling
             self.delete(node.children[i], key_value)
 
     def delete_internal_node(self, node: BTreeNode, key_value: Tuple[int, Any], index: int) -> None:
@@ -151,7 +149,7 @@ class BTree:
             node.keys[index] = self.delete_successor(node.children[index + 1])
         else:
             self.delete_merge(node, index, index + 1)
-            self.delete_internal_node(node.children[index], key_value, t - 1)
+            self.delete(node.children[index], key_value)
 
     def delete_predecessor(self, node: BTreeNode) -> Tuple[int, Any]:
         """
@@ -169,11 +167,13 @@ class BTree:
         """
         if node.is_leaf:
             return node.keys.pop()
-        n = len(node.keys) - 1
-        if len(node.children[n].keys) >= self.t:
-            self.delete_sibling(node, n + 1, n)
-        else:
-            self.delete_merge(node, n, n + 1)
+        n = len(node.keys) # Index of the last child
+        if len(node.children[n].keys) < self.t:
+            if len(node.children[n - 1].keys) >= self.t:
+                self.delete_sibling(node, n, n - 1)
+            else:
+                self.delete_merge(node, n - 1, n)
+                n -= 1
         return self.delete_predecessor(node.children[n])
 
     def delete_successor(self, node: BTreeNode) -> Tuple[int, Any]:
@@ -192,10 +192,11 @@ class BTree:
         """
         if node.is_leaf:
             return node.keys.pop(0)
-        if len(node.children[1].keys) >= self.t:
-            self.delete_sibling(node, 0, 1)
-        else:
-            self.delete_merge(node, 0, 1)
+        if len(node.children[0].keys) < self.t:
+            if len(node.children[1].keys) >= self.t:
+                self.delete_sibling(node, 0, 1)
+            else:
+                self.delete_merge(node, 0, 1)
         return self.delete_successor(node.children[0])
 
     def delete_merge(self, parent_node: BTreeNode, index1: int, index2: int) -> None:
@@ -339,6 +340,1122 @@ class BTree:
         else:
             return self.search_key(key, node.children[i])
 
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        """Lazily yields every key-value pair in the B-tree in key order
+
+        Yields
+        ------
+        tuple of (int, Any)
+            The key-value pairs, smallest key first
+
+        Notes
+        -----
+        Uses an explicit stack of (node, index) pairs instead of recursion, so memory is O(height).
+        The tree should not be modified while iterating
+
+        Examples
+        --------
+        ```
+        for key, value in tree.items():
+            print(key, value)
+        ```
+        """
+        return self.items_from(None)
+
+    def keys(self) -> Iterator[int]:
+        """Lazily yields every key in the B-tree in order
+
+        Yields
+        ------
+        int
+            The keys, smallest first
+        """
+        for key, _ in self.items_from(None):
+            yield key
+
+    def items_from(self, key: Optional[int]) -> Iterator[Tuple[int, Any]]:
+        """Lazily yields the key-value pairs with a key greater than or equal to key, in key order
+
+        Parameters
+        ----------
+        key : int or None
+            The key to start from, it does not have to be in the tree. If None starts from the smallest key
+
+        Yields
+        ------
+        tuple of (int, Any)
+            The key-value pairs, smallest key first
+
+        Examples
+        --------
+        ```
+        for key, value in tree.items_from(42):
+            if key > 100:
+                break # Range scan of [42, 100]
+        ```
+        """
+        # Each stack entry is [node, i], where node.keys[i] is the next key to yield from that node
+        stack: List[list] = []
+
+        # 1. Walk down to the first key >= key, remembering the path
+        node = self.root
+        while True:
+            i = 0
+            if key is not None:
+                while i < len(node.keys) and node.keys[i][0] < key:
+                    i += 1
+            stack.append([node, i])
+            if node.is_leaf:
+                break
+            node = node.children[i]
+
+        # 2. Yield the next key of the deepest node, then walk down the left side of the subtree after it
+        while stack:
+            entry = stack[-1]
+            node, i = entry
+            if i >= len(node.keys):
+                stack.pop()
+                continue
+            entry[1] = i + 1
+            yield node.keys[i]
+            if not node.is_leaf:
+                child = node.children[i + 1]
+                while True:
+                    stack.append([child, 0])
+                    if child.is_leaf:
+                        break
+                    child = child.children[0]
+
+
+class IntBTreeNode:
+    __slots__ = ("is_leaf", "keys", "values", "children")
+
+    def __init__(self, is_leaf: bool = False, value_typecode: Optional[str] = None) -> None:
+        """Represents a single node in an IntBTree
+
+        Parameters
+        ----------
+        is_leaf : bool, optional
+            Indicates whether the node is a leaf node. Default is False
+
+        value_typecode : str, optional
+            If set, values are stored in an array of this typecode (i.e. "q") instead of a list. Default is None
+
+        Notes
+        -----
+        Instead of a list of (key, value) tuples the keys are stored unboxed in an array('q'),
+        and keys[i] goes with values[i]
+        """
+        self.is_leaf: bool = is_leaf
+        self.keys: array = array("q")
+        self.values: Union[List[Any], array] = array(value_typecode) if value_typecode else []
+        self.children: List['IntBTreeNode'] = []
+
+
+class IntBTree:
+    def __init__(self, min_degree: int, value_typecode: Optional[str] = None) -> None:
+        """Constructs an empty B-tree specialized for int keys, with the same interface as BTree
+
+        Parameters
+        ----------
+        min_degree : int
+            The minimum degree (t) of the B-tree. Each node can contain at most 2*t - 1 keys
+
+        value_typecode : str, optional
+            If all the values are numbers, the array typecode to store them with (i.e. "q" or "d").
+            Default is None, which stores values in a list
+
+        Notes
+        -----
+        Keys must fit in a signed 64-bit int. A BTree entry is a tuple, a boxed key and a boxed value,
+        here it's 8 bytes in an array plus a list slot for the value (or 8 more bytes with value_typecode).
+        Searching within a node uses bisect on the array instead of a Python loop
+        """
+        self.value_typecode: Optional[str] = value_typecode
+        self.root: IntBTreeNode = IntBTreeNode(is_leaf=True, value_typecode=value_typecode)
+        self.t: int = min_degree
+
+    def insert(self, key_value: Tuple[int, Any]) -> None:
+        """Inserts a key-value pair into the B-tree
+
+        Parameters
+        ----------
+        key_value : tuple of (int, Any)
+            The key-value pair to insert
+
+        Notes
+        -----
+        If the root node is full, the tree grows in height
+        """
+        root = self.root
+        if len(root.keys) == (2 * self.t) - 1:
+            new_root = IntBTreeNode(value_typecode=self.value_typecode)
+            self.root = new_root
+            new_root.children.insert(0, root)
+            self.split_child(new_root, 0)
+            self.insert_non_full(new_root, key_value[0], key_value[1])
+        else:
+            self.insert_non_full(root, key_value[0], key_value[1])
+
+    def insert_non_full(self, node: IntBTreeNode, key: int, value: Any) -> None:
+        """Helper method to insert a key-value into a node that is not full
+
+        Parameters
+        ----------
+        node : IntBTreeNode
+            Node into which the key is to be inserted
+
+        key : int
+            The key to insert
+
+        value : Any
+            The value to insert
+        """
+        while not node.is_leaf:
+            i = bisect_right(node.keys, key)
+            if len(node.children[i].keys) == (2 * self.t) - 1:
+                self.split_child(node, i)
+                if key > node.keys[i]:
+                    i += 1
+            node = node.children[i]
+        i = bisect_right(node.keys, key)
+        node.keys.insert(i, key)
+        node.values.insert(i, value)
+
+    def split_child(self, parent_node: IntBTreeNode, child_index: int) -> None:
+        """Splits a full child node into two and updates the parent node
+
+        Parameters
+        ----------
+        parent_node : IntBTreeNode
+            The node with the full child
+
+        child_index : int
+            Index of the child to split
+        """
+        t = self.t
+        full_child = parent_node.children[child_index]
+        new_child = IntBTreeNode(is_leaf=full_child.is_leaf, value_typecode=self.value_typecode)
+
+        parent_node.children.insert(child_index + 1, new_child)
+        parent_node.keys.insert(child_index, full_child.keys[t - 1])
+        parent_node.values.insert(child_index, full_child.values[t - 1])
+
+        new_child.keys = full_child.keys[t:]
+        new_child.values = full_child.values[t:]
+        del full_child.keys[t - 1:]
+        del full_child.values[t - 1:]
+
+        if not full_child.is_leaf:
+            new_child.children = full_child.children[t:]
+            del full_child.children[t:]
+
+    def search_key(self, key: int, node: Optional[IntBTreeNode] = None) -> Optional[Tuple[IntBTreeNode, int]]:
+        """Searches for a key in the B-tree
+
+        Parameters
+        ----------
+        key : int
+            The key to search for
+
+        node : IntBTreeNode, optional
+            Node to start search from. If None, starts from root
+
+        Returns
+        -------
+        tuple or None
+            Tuple of (node, index) if key is found; None otherwise, the value is node.values[index]
+        """
+        if node is None:
+            node = self.root
+        while True:
+            i = bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                return node, i
+            if node.is_leaf:
+                return None
+            node = node.children[i]
+
+    def delete(self, node: IntBTreeNode, key_value: Tuple[int, Any]) -> None:
+        """Deletes a key from the B-tree
+
+        Parameters
+        ----------
+        node : IntBTreeNode
+            The current node from which to start deletion
+
+        key_value : tuple of (int, Any)
+            The key-value pair to delete, only the key is used
+
+        Notes
+        -----
+        Works the same as BTree.delete(), every child is topped up to t keys before descending into it
+        """
+        t = self.t
+        key = key_value[0]
+        while True:
+            i = bisect_left(node.keys, key)
+            found = i < len(node.keys) and node.keys[i] == key
+            if node.is_leaf:
+                if found:
+                    del node.keys[i]
+                    del node.values[i]
+                return
+            if found:
+                if len(node.children[i].keys) >= t:
+                    node.keys[i], node.values[i] = self.delete_predecessor(node.children[i])
+                    return
+                if len(node.children[i + 1].keys) >= t:
+                    node.keys[i], node.values[i] = self.delete_successor(node.children[i + 1])
+                    return
+                self.delete_merge(node, i, i + 1)
+            elif len(node.children[i].keys) < t:
+                if i != 0 and len(node.children[i - 1].keys) >= t:
+                    self.delete_sibling(node, i, i - 1)
+                elif i + 1 < len(node.children) and len(node.children[i + 1].keys) >= t:
+                    self.delete_sibling(node, i, i + 1)
+                elif i + 1 < len(node.children):
+                    self.delete_merge(node, i, i + 1)
+                else:
+                    self.delete_merge(node, i, i - 1)
+                    i -= 1 # Merged into the left sibling
+            node = node.children[i]
+
+    def delete_predecessor(self, node: IntBTreeNode) -> Tuple[int, Any]:
+        """Deletes and returns the predecessor key-value pair in subtree rooted at node"""
+        while not node.is_leaf:
+            n = len(node.keys) # Index of the last child
+            if len(node.children[n].keys) < self.t:
+                if len(node.children[n - 1].keys) >= self.t:
+                    self.delete_sibling(node, n, n - 1)
+                else:
+                    self.delete_merge(node, n - 1, n)
+                    n -= 1
+            node = node.children[n]
+        return node.keys.pop(), node.values.pop()
+
+    def delete_successor(self, node: IntBTreeNode) -> Tuple[int, Any]:
+        """Deletes and returns the successor key-value pair in subtree rooted at node"""
+        while not node.is_leaf:
+            if len(node.children[0].keys) < self.t:
+                if len(node.children[1].keys) >= self.t:
+                    self.delete_sibling(node, 0, 1)
+                else:
+                    self.delete_merge(node, 0, 1)
+            node = node.children[0]
+        return node.keys.pop(0), node.values.pop(0)
+
+    def delete_merge(self, parent_node: IntBTreeNode, index1: int, index2: int) -> None:
+        """Merges two neighbouring children of a node during deletion, along with the key between them
+
+        Parameters
+        ----------
+        parent_node : IntBTreeNode
+            The parent node
+
+        index1 : int
+            Index of one child to merge
+
+        index2 : int
+            Index of the other child to merge
+        """
+        left, right = min(index1, index2), max(index1, index2)
+        merged_node = parent_node.children[left]
+        right_node = parent_node.children[right]
+
+        merged_node.keys.append(parent_node.keys.pop(left))
+        merged_node.values.append(parent_node.values.pop(left))
+        merged_node.keys.extend(right_node.keys)
+        merged_node.values.extend(right_node.values)
+        merged_node.children.extend(right_node.children)
+        parent_node.children.pop(right)
+
+        if parent_node is self.root and len(parent_node.keys) == 0:
+            self.root = merged_node
+
+    def delete_sibling(self, parent_node: IntBTreeNode, index: int, sibling_index: int) -> None:
+        """Moves a key from a sibling (through the parent) to an underfull child
+
+        Parameters
+        ----------
+        parent_node : IntBTreeNode
+            The parent node
+
+        index : int
+            Index of the underfull child
+
+        sibling_index : int
+            Index of the sibling
+        """
+        child = parent_node.children[index]
+        sibling = parent_node.children[sibling_index]
+        if index < sibling_index:
+            child.keys.append(parent_node.keys[index])
+            child.values.append(parent_node.values[index])
+            parent_node.keys[index] = sibling.keys.pop(0)
+            parent_node.values[index] = sibling.values.pop(0)
+            if sibling.children:
+                child.children.append(sibling.children.pop(0))
+        else:
+            child.keys.insert(0, parent_node.keys[index - 1])
+            child.values.insert(0, parent_node.values[index - 1])
+            parent_node.keys[index - 1] = sibling.keys.pop()
+            parent_node.values[index - 1] = sibling.values.pop()
+            if sibling.children:
+                child.children.insert(0, sibling.children.pop())
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        """Lazily yields every key-value pair in the B-tree in key order, see BTree.items()"""
+        return self.items_from(None)
+
+    def keys(self) -> Iterator[int]:
+        """Lazily yields every key in the B-tree in order"""
+        for key, _ in self.items_from(None):
+            yield key
+
+    def items_from(self, key: Optional[int]) -> Iterator[Tuple[int, Any]]:
+        """Lazily yields the key-value pairs with a key greater than or equal to key, see BTree.items_from()"""
+        stack: List[list] = []
+        node = self.root
+        while True:
+            i = 0 if key is None else bisect_left(node.keys, key)
+            stack.append([node, i])
+            if node.is_leaf:
+                break
+            node = node.children[i]
+
+        while stack:
+            entry = stack[-1]
+            node, i = entry
+            if i >= len(node.keys):
+                stack.pop()
+                continue
+            entry[1] = i + 1
+            yield node.keys[i], node.values[i]
+            if not node.is_leaf:
+                child = node.children[i + 1]
+                while True:
+                    stack.append([child, 0])
+                    if child.is_leaf:
+                        break
+                    child = child.children[0]
+
+
+def compare_memory(number_of_keys: int = 100_000, t_value: int = 16) -> Tuple[int, int, int]:
+    """Measures how much memory a BTree and an IntBTree use for the same int keys and values
+
+    Parameters
+    ----------
+    number_of_keys : int, optional
+        How many key-value pairs to insert, by default 100_000
+
+    t_value : int, optional
+        The minimum degree of the trees, by default 16
+
+    Returns
+    -------
+    tuple of (int, int, int)
+        The bytes used by the BTree, the IntBTree, and the IntBTree with value_typecode="q"
+    """
+    results = []
+    for make_tree in (lambda: BTree(t_value), lambda: IntBTree(t_value), lambda: IntBTree(t_value, value_typecode="q")):
+        numbers = Random(number_of_keys) # Same keys for each tree, created while tracing so boxed ints are counted
+        tracemalloc.start()
+        tree = make_tree()
+        for _ in range(number_of_keys):
+            tree.insert((numbers.randint(0, 2**62), numbers.randint(0, 2**62)))
+        results.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del tree
+    return results[0], results[1], results[2]
+
+
+def common_prefix_length(first: str, second: str) -> int:
+    """Finds the length of the longest prefix two strings share
+
+    Parameters
+    ----------
+    first : str
+        The first string
+
+    second : str
+        The second string
+
+    Returns
+    -------
+    int
+        The number of leading characters that are the same in both
+    """
+    length = min(len(first), len(second))
+    i = 0
+    while i < length and first[i] == second[i]:
+        i += 1
+    return i
+
+
+class StringBTreeNode:
+    __slots__ = ("is_leaf", "prefix", "suffixes", "values", "children", "next", "previous")
+
+    def __init__(self, is_leaf: bool = False) -> None:
+        """Represents a single node in a StringBTree
+
+        Parameters
+        ----------
+        is_leaf : bool, optional
+            Indicates whether the node is a leaf node. Default is False
+
+        Notes
+        -----
+        Every key (or separator) in the node starts with prefix, so only the rest of it is stored
+        in suffixes. The full key i is prefix + suffixes[i]. Leaves store the values (values[i] goes
+        with key i) and links to the next and previous leaves, internal nodes store children
+        """
+        self.is_leaf: bool = is_leaf
+        self.prefix: str = ""
+        self.suffixes: List[str] = []
+        self.values: List[Any] = []
+        self.children: List['StringBTreeNode'] = []
+        self.next: Optional['StringBTreeNode'] = None
+        self.previous: Optional['StringBTreeNode'] = None
+
+
+class StringBTree:
+    def __init__(self, min_degree: int) -> None:
+        """Constructs an empty B-tree for str keys, with prefix compression and suffix truncation
+
+        Parameters
+        ----------
+        min_degree : int
+            The minimum degree (t) of the B-tree. Each node can contain at most 2*t - 1 keys
+
+        Notes
+        -----
+        This is laid out like a B+ tree, all the key-value pairs are in the leaves and internal nodes
+        only hold separators. That's what allows suffix truncation, when a leaf splits the separator
+        is the shortest string that sorts between the two halves ("https://a.com/x" and
+        "https://a.com/zebra" are separated by "https://a.com/z"), instead of a full key.
+
+        Each node also stores the prefix all of it's keys share once, so for keys like URLs and paths
+        most of each key isn't repeated. Searching a node only compares the part after the prefix.
+        Inserting an existing key replaces it's value
+        """
+        self.root: StringBTreeNode = StringBTreeNode(is_leaf=True)
+        self.t: int = min_degree
+
+    def insert(self, key_value: Tuple[str, Any]) -> None:
+        """Inserts a key-value pair into the B-tree, replacing the value if the key is already there
+
+        Parameters
+        ----------
+        key_value : tuple of (str, Any)
+            The key-value pair to insert
+
+        Notes
+        -----
+        Full nodes are split on the way down, if the root node is full the tree grows in height
+        """
+        key, value = key_value
+        full = (2 * self.t) - 1
+        if len(self.root.suffixes) == full:
+            new_root = StringBTreeNode()
+            new_root.children.append(self.root)
+            self.root = new_root
+            self.split_child(new_root, 0)
+
+        node = self.root
+        while not node.is_leaf:
+            i = self.find_index(node, key, bisect_right)
+            if len(node.children[i].suffixes) == full:
+                self.split_child(node, i)
+                i = self.find_index(node, key, bisect_right)
+            node = node.children[i]
+
+        i = self.find_index(node, key, bisect_left)
+        if self.matches(node, key, i):
+            node.values[i] = value
+            return
+        self.insert_key(node, i, key)
+        node.values.insert(i, value)
+
+    def split_child(self, parent_node: StringBTreeNode, child_index: int) -> None:
+        """Splits a full child node into two and adds a separator for them to the parent node
+
+        Parameters
+        ----------
+        parent_node : StringBTreeNode
+            The node with the full child
+
+        child_index : int
+            Index of the child to split
+        """
+        t = self.t
+        full_child = parent_node.children[child_index]
+        new_child = StringBTreeNode(is_leaf=full_child.is_leaf)
+        keys = [full_child.prefix + suffix for suffix in full_child.suffixes]
+
+        if full_child.is_leaf:
+            # Leaves keep every key, so the separator only has to sort between the two halves
+            left_keys, right_keys = keys[:t], keys[t:]
+            separator = right_keys[0][:common_prefix_length(left_keys[-1], right_keys[0]) + 1]
+            new_child.values = full_child.values[t:]
+            del full_child.values[t:]
+            new_child.next = full_child.next
+            new_child.previous = full_child
+            if new_child.next is not None:
+                new_child.next.previous = new_child
+            full_child.next = new_child
+        else:
+            left_keys, separator, right_keys = keys[:t - 1], keys[t - 1], keys[t:]
+            new_child.children = full_child.children[t:]
+            del full_child.children[t:]
+
+        self.compress(full_child, left_keys)
+        self.compress(new_child, right_keys)
+        self.insert_key(parent_node, child_index, separator)
+        parent_node.children.insert(child_index + 1, new_child)
+
+    def compress(self, node: StringBTreeNode, keys: List[str]) -> None:
+        """Replaces the keys in a node, storing the prefix they share once
+
+        Parameters
+        ----------
+        node : StringBTreeNode
+            The node to update
+
+        keys : List[str]
+            The sorted full keys the node should hold
+        """
+        if not keys:
+            node.prefix, node.suffixes = "", []
+            return
+        # The keys are sorted, so the first and last share the least
+        length = common_prefix_length(keys[0], keys[-1])
+        node.prefix = keys[0][:length]
+        node.suffixes = [key[length:] for key in keys]
+
+    def insert_key(self, node: StringBTreeNode, index: int, key: str) -> None:
+        """Inserts a full key into a node at index, shortening the node's prefix if the key doesn't share it
+
+        Parameters
+        ----------
+        node : StringBTreeNode
+            The node to insert into
+
+        index : int
+            Where in node.suffixes the key belongs
+
+        key : str
+            The full key to insert
+        """
+        if not node.suffixes:
+            node.prefix = key
+        elif not key.startswith(node.prefix):
+            length = common_prefix_length(node.prefix, key)
+            removed = node.prefix[length:]
+            node.suffixes = [removed + suffix for suffix in node.suffixes]
+            node.prefix = node.prefix[:length]
+        node.suffixes.insert(index, key[len(node.prefix):])
+
+    def find_index(self, node: StringBTreeNode, key: str, bisect_function: Callable = bisect_left) -> int:
+        """Finds where a key belongs in a node, only comparing the part of the key after the node's prefix
+
+        Parameters
+        ----------
+        node : StringBTreeNode
+            The node to search
+
+        key : str
+            The full key to search for
+
+        bisect_function : Callable, optional
+            bisect_left to find a key, bisect_right to find which child to descend into. Default is bisect_left
+
+        Returns
+        -------
+        int
+            The index in node.suffixes (or node.children with bisect_right) for the key
+        """
+        prefix = node.prefix
+        if key.startswith(prefix):
+            return bisect_function(node.suffixes, key[len(prefix):])
+        # If the key doesn't start with the prefix it sorts before or after every key in the node
+        return 0 if key < prefix else len(node.suffixes)
+
+    def matches(self, node: StringBTreeNode, key: str, index: int) -> bool:
+        """Checks if key i in a node is the given key"""
+        return index < len(node.suffixes) and key.startswith(node.prefix) and node.suffixes[index] == key[len(node.prefix):]
+
+    def find_leaf(self, key: str, node: Optional[StringBTreeNode] = None) -> StringBTreeNode:
+        """Finds the leaf a key is (or would be) in
+
+        Parameters
+        ----------
+        key : str
+            The key to search for
+
+        node : StringBTreeNode, optional
+            Node to start search from. If None, starts from root
+
+        Returns
+        -------
+        StringBTreeNode
+            The leaf
+        """
+        if node is None:
+            node = self.root
+        while not node.is_leaf:
+            node = node.children[self.find_index(node, key, bisect_right)]
+        return node
+
+    def search_key(self, key: str, node: Optional[StringBTreeNode] = None) -> Optional[Tuple[StringBTreeNode, int]]:
+        """Searches for a key in the B-tree
+
+        Parameters
+        ----------
+        key : str
+            The key to search for
+
+        node : StringBTreeNode, optional
+            Node to start search from. If None, starts from root
+
+        Returns
+        -------
+        tuple or None
+            Tuple of (leaf, index) if key is found; None otherwise, the value is leaf.values[index]
+
+        Examples
+        --------
+        ```
+        tree.search_key("https://example.com/about") # (StringBTreeNode, index)
+        ```
+        """
+        leaf = self.find_leaf(key, node)
+        i = self.find_index(leaf, key, bisect_left)
+        if self.matches(leaf, key, i):
+            return leaf, i
+        return None
+
+    def delete(self, node: StringBTreeNode, key_value: Tuple[str, Any]) -> None:
+        """Deletes a key from the B-tree
+
+        Parameters
+        ----------
+        node : StringBTreeNode
+            The node from which to start deletion (usually the root)
+
+        key_value : tuple of (str, Any)
+            The key-value pair to delete, only the key is used
+
+        Notes
+        -----
+        On the way back up, a node with fewer than t - 1 keys is merged into a sibling if they fit in
+        one node, and a node with nothing left is removed. When the root only has one child the tree
+        shrinks in height. A node's prefix is widened when it's first or last key is removed
+        """
+        # 1. Find the leaf, remembering the path down to it
+        key = key_value[0]
+        path = [] # (node, index of the child that was descended into)
+        while not node.is_leaf:
+            i = self.find_index(node, key, bisect_right)
+            path.append((node, i))
+            node = node.children[i]
+        i = self.find_index(node, key, bisect_left)
+        if not self.matches(node, key, i):
+            return
+
+        # 2. Remove the key, the keys are sorted so the prefix they share can only grow if the first or last one is gone
+        node.suffixes.pop(i)
+        node.values.pop(i)
+        if i == 0 or i == len(node.suffixes):
+            self.compress(node, [node.prefix + suffix for suffix in node.suffixes])
+
+        # 3. Go back up, removing empty nodes and merging underfull ones
+        full = (2 * self.t) - 1
+        while path:
+            parent, i = path.pop()
+            child = parent.children[i]
+            if not (child.suffixes if child.is_leaf else child.children):
+                self.remove_child(parent, i)
+            elif len(child.suffixes) >= self.t - 1:
+                break
+            elif i > 0 and self.merged_size(parent, i - 1) <= full:
+                self.merge_children(parent, i - 1)
+            elif i + 1 < len(parent.children) and self.merged_size(parent, i) <= full:
+                self.merge_children(parent, i)
+            else:
+                break
+
+        # 4. Shrink the tree while the root only routes to one child (or none)
+        while not self.root.is_leaf and len(self.root.children) <= 1:
+            self.root = self.root.children[0] if self.root.children else StringBTreeNode(is_leaf=True)
+
+    def remove_child(self, parent_node: StringBTreeNode, child_index: int) -> None:
+        """Removes an empty child from a node, along with one of the separators next to it
+
+        Parameters
+        ----------
+        parent_node : StringBTreeNode
+            The node with the empty child
+
+        child_index : int
+            Index of the child to remove
+        """
+        child = parent_node.children.pop(child_index)
+        if child.is_leaf:
+            if child.previous is not None:
+                child.previous.next = child.next
+            if child.next is not None:
+                child.next.previous = child.previous
+        if parent_node.suffixes:
+            # Removing the separator before the child gives it's (empty) range to the left sibling
+            keys = [parent_node.prefix + suffix for suffix in parent_node.suffixes]
+            keys.pop(child_index - 1 if child_index > 0 else 0)
+            self.compress(parent_node, keys)
+
+    def merged_size(self, parent_node: StringBTreeNode, index: int) -> int:
+        """Returns how many keys there would be after merging children index and index + 1 of a node"""
+        left, right = parent_node.children[index], parent_node.children[index + 1]
+        size = len(left.suffixes) + len(right.suffixes)
+        return size if left.is_leaf else size + 1 # Internal nodes also take the separator between them
+
+    def merge_children(self, parent_node: StringBTreeNode, index: int) -> None:
+        """Merges child index + 1 of a node into child index, and removes the separator between them
+
+        Parameters
+        ----------
+        parent_node : StringBTreeNode
+            The parent node
+
+        index : int
+            Index of the left child to merge
+        """
+        left = parent_node.children[index]
+        right = parent_node.children.pop(index + 1)
+        separators = [parent_node.prefix + suffix for suffix in parent_node.suffixes]
+        separator = separators.pop(index)
+        keys = [left.prefix + suffix for suffix in left.suffixes]
+        right_keys = [right.prefix + suffix for suffix in right.suffixes]
+
+        if left.is_leaf:
+            # Leaves already hold every key, so the separator just goes away
+            keys.extend(right_keys)
+            left.values.extend(right.values)
+            left.next = right.next
+            if left.next is not None:
+                left.next.previous = left
+        else:
+            keys.append(separator)
+            keys.extend(right_keys)
+            left.children.extend(right.children)
+
+        self.compress(left, keys)
+        self.compress(parent_node, separators)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Lazily yields every key-value pair in the B-tree in key order, by following the leaf links"""
+        return self.items_from(None)
+
+    def keys(self) -> Iterator[str]:
+        """Lazily yields every key in the B-tree in order"""
+        for key, _ in self.items_from(None):
+            yield key
+
+    def items_from(self, key: Optional[str]) -> Iterator[Tuple[str, Any]]:
+        """Lazily yields the key-value pairs with a key greater than or equal to key, in key order
+
+        Parameters
+        ----------
+        key : str or None
+            The key to start from, it does not have to be in the tree. If None starts from the smallest key
+
+        Yields
+        ------
+        tuple of (str, Any)
+            The key-value pairs, smallest key first
+        """
+        if key is None:
+            leaf = self.root
+            while not leaf.is_leaf:
+                leaf = leaf.children[0]
+            i = 0
+        else:
+            leaf = self.find_leaf(key)
+            i = self.find_index(leaf, key, bisect_left)
+        while leaf is not None:
+            prefix = leaf.prefix
+            for j in range(i, len(leaf.suffixes)):
+                yield prefix + leaf.suffixes[j], leaf.values[j]
+            leaf, i = leaf.next, 0
+
+
+def compare_string_keys(number_of_keys: int = 100_000, t_value: int = 16, repeat: int = 5) -> Tuple[Tuple[int, float], Tuple[int, float]]:
+    """Measures memory and search time of a BTree and a StringBTree for URL-like keys with long shared prefixes
+
+    Parameters
+    ----------
+    number_of_keys : int, optional
+        How many key-value pairs to insert, by default 100_000
+
+    t_value : int, optional
+        The minimum degree of the trees, by default 16
+
+    repeat : int, optional
+        How many times to search every key, the fastest run is kept (like timeit does), by default 5
+
+    Returns
+    -------
+    tuple of ((int, float), (int, float))
+        The bytes used and best seconds to search every key, for the BTree then the StringBTree
+    """
+    sites = [f"https://www.example-{site}.com/blog/posts/" for site in range(10)]
+    results = []
+    for make_tree in (lambda: BTree(t_value), lambda: StringBTree(t_value)):
+        numbers = Random(number_of_keys) # Same keys for each tree, created while tracing so they're counted
+        tracemalloc.start()
+        tree = make_tree()
+        for i in range(number_of_keys):
+            tree.insert((f"{sites[numbers.randrange(len(sites))]}{numbers.randrange(2020, 2025)}/{i:07}", i))
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        keys = list(tree.keys())
+        times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            for key in keys:
+                tree.search_key(key)
+            times.append(perf_counter() - start)
+        results.append((memory, min(times)))
+        del tree, keys
+    return results[0], results[1]
+
+
+class IndexedBTree(BTree):
+    def __init__(self, min_degree: int) -> None:
+        """A BTree with a hash index from each key to the node it's stored in, for O(1) point lookups
+
+        Parameters
+        ----------
+        min_degree : int
+            The minimum degree (t) of the B-tree. Each node can contain at most 2*t - 1 keys
+
+        Notes
+        -----
+        The tree still keeps the keys in order for items_from() and other range scans, but search_key()
+        goes straight to the node through the index instead of descending from the root. Every method
+        that moves keys between nodes (splits, merges, borrowing from a sibling) updates the index
+        for the keys it moved, which is O(t). Keys are unique, inserting an existing key replaces it's value
+        """
+        super().__init__(min_degree)
+        self.index: Dict[int, BTreeNode] = {}
+
+    def insert(self, key_value: Tuple[int, Any]) -> None:
+        """Inserts a key-value pair into the B-tree, replacing the value if the key is already there
+
+        Parameters
+        ----------
+        key_value : tuple of (int, Any)
+            The key-value pair to insert
+        """
+        result = self.search_key(key_value[0])
+        if result is not None:
+            node, i = result
+            node.keys[i] = key_value
+            return
+        super().insert(key_value)
+
+    def insert_non_full(self, node: BTreeNode, key_value: Tuple[int, Any]) -> None:
+        """Same as BTree.insert_non_full(), then points the index at the leaf the key went into"""
+        super().insert_non_full(node, key_value)
+        if node.is_leaf:
+            self.index[key_value[0]] = node
+
+    def split_child(self, parent_node: BTreeNode, child_index: int) -> None:
+        """Same as BTree.split_child(), then points the index at the new child and parent for the keys moved to them"""
+        super().split_child(parent_node, child_index)
+        new_child = parent_node.children[child_index + 1]
+        for key, _ in new_child.keys:
+            self.index[key] = new_child
+        self.index[parent_node.keys[child_index][0]] = parent_node
+
+    def delete(self, node: BTreeNode, key_value: Tuple[int, Any]) -> None:
+        """Same as BTree.delete(), then removes the key from the index"""
+        super().delete(node, key_value)
+        self.index.pop(key_value[0], None)
+
+    def delete_internal_node(self, node: BTreeNode, key_value: Tuple[int, Any], index: int) -> None:
+        """Same as BTree.delete_internal_node(), then points the index at node for the key that replaced the deleted one"""
+        super().delete_internal_node(node, key_value, index)
+        # Either the predecessor/successor was moved into node.keys[index], or it was already in node
+        if index < len(node.keys):
+            self.index[node.keys[index][0]] = node
+
+    def delete_merge(self, parent_node: BTreeNode, index1: int, index2: int) -> None:
+        """Same as BTree.delete_merge(), then points the index at the merged node for all of it's keys"""
+        super().delete_merge(parent_node, index1, index2)
+        merged_node = parent_node.children[min(index1, index2)]
+        for key, _ in merged_node.keys:
+            self.index[key] = merged_node
+
+    def delete_sibling(self, parent_node: BTreeNode, index: int, sibling_index: int) -> None:
+        """Same as BTree.delete_sibling(), then points the index at the child and parent for the keys moved to them"""
+        super().delete_sibling(parent_node, index, sibling_index)
+        child = parent_node.children[index]
+        for key, _ in child.keys:
+            self.index[key] = child
+        parent_index = index if index < sibling_index else index - 1
+        self.index[parent_node.keys[parent_index][0]] = parent_node
+
+    def search_key(self, key: int, node: Optional[BTreeNode] = None) -> Optional[Tuple[BTreeNode, int]]:
+        """Searches for a key using the hash index
+
+        Parameters
+        ----------
+        key : int
+            The key to search for
+
+        node : BTreeNode, optional
+            Node to start search from. If set, searches down from it like BTree.search_key()
+
+        Returns
+        -------
+        tuple or None
+            Tuple of (node, index) if key is found; None otherwise
+        """
+        if node is not None:
+            return super().search_key(key, node)
+        node = self.index.get(key)
+        if node is None:
+            return None
+        return node, bisect_left(node.keys, key, key=itemgetter(0))
+
+
+def benchmark_indexed(number_of_keys: int = 100_000, number_of_lookups: int = 100_000, number_of_scans: int = 100, t_value: int = 16) -> Dict[str, Tuple[float, float, float]]:
+    """Times inserts, point lookups and range scans of 100 keys for a BTree, a dict (hash table) and an IndexedBTree
+
+    Parameters
+    ----------
+    number_of_keys : int, optional
+        How many key-value pairs to insert, by default 100_000
+
+    number_of_lookups : int, optional
+        How many random keys to look up, by default 100_000
+
+    number_of_scans : int, optional
+        How many range scans to do, by default 100
+
+    t_value : int, optional
+        The minimum degree of the trees, by default 16
+
+    Returns
+    -------
+    dict of str to tuple of (float, float, float)
+        The seconds spent on inserts, point lookups and range scans for each structure
+    """
+    keys = list(range(number_of_keys))
+    numbers = Random(number_of_keys)
+    numbers.shuffle(keys)
+    lookups = [numbers.randrange(number_of_keys) for _ in range(number_of_lookups)]
+    scans = [numbers.randrange(number_of_keys) for _ in range(number_of_scans)]
+    results = {}
+
+    for tree in (BTree(t_value), IndexedBTree(t_value)):
+        start = perf_counter()
+        for key in keys:
+            tree.insert((key, key))
+        insert_seconds = perf_counter() - start
+
+        start = perf_counter()
+        for key in lookups:
+            tree.search_key(key)
+        lookup_seconds = perf_counter() - start
+
+        start = perf_counter()
+        for key in scans:
+            for _ in zip(tree.items_from(key), range(100)):
+                pass
+        results[type(tree).__name__] = (insert_seconds, lookup_seconds, perf_counter() - start)
+
+    table = {}
+    start = perf_counter()
+    for key in keys:
+        table[key] = key
+    insert_seconds = perf_counter() - start
+
+    start = perf_counter()
+    for key in lookups:
+        table.get(key)
+    lookup_seconds = perf_counter() - start
+
+    # A hash table has no order, so a range scan checks every key then sorts the matches
+    start = perf_counter()
+    for key in scans:
+        sorted(item for item in table.items() if key <= item[0] < key + 100)
+    results["dict"] = (insert_seconds, lookup_seconds, perf_counter() - start)
+    return results
+
+
+def merge(*sources: Iterable[Tuple[int, Any]], resolve: Optional[Callable[[Any, Any], Any]] = None) -> Iterator[Tuple[int, Any]]:
+    """Lazily merges several sorted streams of key-value pairs into one sorted stream
+
+    Parameters
+    ----------
+    *sources : iterable of tuple of (int, Any)
+        Streams already sorted by key, ordered from oldest to newest. For example tree.items(),
+        a generator reading lines from a sorted file, or the entries of an SSTable
+
+    resolve : callable, optional
+        Called as resolve(older_value, newer_value) when a key shows up more than once, and its
+        result is kept. If None the newest value wins (like an LSM tree)
+
+    Yields
+    ------
+    tuple of (int, Any)
+        One key-value pair per key, smallest key first
+
+    Notes
+    -----
+    Only the current head of each source is held in a heap, so memory is O(number of sources)
+
+    Examples
+    --------
+    ```
+    old, new = BTree(3), BTree(3)
+    old.insert((1, "a")); old.insert((2, "b"))
+    new.insert((2, "B")); new.insert((3, "C"))
+    list(merge(old.items(), new.items())) # [(1, 'a'), (2, 'B'), (3, 'C')]
+    ```
+    """
+    # Heap entries are (key, source index, position in source, value, iterator) so ties never compare values
+    heap = []
+    for index, source in enumerate(sources):
+        iterator = iter(source)
+        for key, value in iterator:
+            heap.append((key, index, 0, value, iterator))
+            break
+    heapify(heap)
+
+    found = False
+    current_key, current_value = None, None
+    while heap:
+        key, index, position, value, iterator = heap[0]
+        following = next(iterator, None)
+        if following is None:
+            heappop(heap)
+        else:
+            heapreplace(heap, (following[0], index, position + 1, following[1], iterator))
+
+        if found and key == current_key:
+            current_value = value if resolve is None else resolve(current_value, value)
+        else:
+            if found:
+                yield current_key, current_value
+            found = True
+            current_key, current_value = key, value
+    if found:
+        yield current_key, current_value
+
+
 if __name__ == '__main__':
   number_of_nodes = 1_000_000
   max_node_value = 100_000
@@ -367,3 +1484,23 @@ tree constructed with
     print(f"Keys in result row:\n\t{res[0].keys}\nTook {res[1]+1} checks to find {search_value}")
   else:
     print(f"Value {search_value} was not in tree")
+
+  btree_bytes, int_btree_bytes, int_btree_array_bytes = compare_memory()
+  print(f"""
+memory used for 100,000 int keys and values
+\tBTree: {btree_bytes:,} bytes
+\tIntBTree: {int_btree_bytes:,} bytes ({btree_bytes/int_btree_bytes:.2f}x less)
+\tIntBTree (value_typecode="q"): {int_btree_array_bytes:,} bytes ({btree_bytes/int_btree_array_bytes:.2f}x less)
+""")
+
+  (btree_bytes, btree_seconds), (string_btree_bytes, string_btree_seconds) = compare_string_keys()
+  print(f"""
+100,000 URL keys
+\tBTree: {btree_bytes:,} bytes, {btree_seconds:.2f}s to search every key (fastest of 5 runs)
+\tStringBTree: {string_btree_bytes:,} bytes ({btree_bytes/string_btree_bytes:.2f}x less), {string_btree_seconds:.2f}s to search every key (fastest of 5 runs)
+""")
+
+  results = benchmark_indexed()
+  print("100,000 keys, 100,000 point lookups, 100 range scans of 100 keys")
+  for name, (insert_seconds, lookup_seconds, scan_seconds) in results.items():
+    print(f"\t{name}: inserts {insert_seconds:.2f}s, point lookups {lookup_seconds:.2f}s, range scans {scan_seconds:.2f}s")